@@ -27,11 +27,20 @@
 #       Added support for Reifendiagnose -R --reifendiagnose
 # Version 0.5 / 2025-01-07
 #       Reworked csvoutput, timezone handling
+# Version 0.6 / 2026-08-28
+#       Performance optimizations: use orjson for JSON parsing (if installed),
+#       vectorized CSV pipeline with pandas/numpy (if installed),
+#       streaming JSON input with ijson (if installed), streaming CSV output
 
 import sys
 import argparse
+import concurrent.futures
 import json
-from datetime import datetime
+import csv
+import locale
+from datetime import datetime, timezone
+from functools import lru_cache
+from operator import itemgetter
 from zoneinfo import ZoneInfo
 
 
@@ -41,17 +50,100 @@ import tzdata
 from icecream import ic
 # Disable debugging
 ic.disable()
+# orjson is considerably faster than stdlib json, but optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+# pandas/numpy enable a vectorized CSV pipeline for large Ladehistorie files, also optional
+try:
+    import pandas as pd
+    import numpy as np
+except ImportError:
+    pd = None
+# numba JIT-compiles the per-record energy math, also optional
+try:
+    import numba
+except ImportError:
+    numba = None
+# ijson parses large JSON files incrementally with constant memory usage, also optional
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 # Local modules
 from verbose import verbose, warning, error
 from csvoutput import csv_output
 
-VERSION = "0.5 / 2025-01-07"
+VERSION = "0.6 / 2026-08-28"
 AUTHOR  = "Martin Junius"
 NAME    = "bmw-cardata"
 
 
 
+# Fixed timestamp format for text and CSV output
+FMT = "%Y-%m-%d %H:%M:%S"
+
+
+# Attributes of a single charging record, fetched with one C-level multi-key lookup
+_FIELDS = itemgetter("displayedSoc", "displayedStartSoc", "endTime",
+                     "energyConsumedFromPowerGridKwh", "energyIncreaseHvbKwh",
+                     "isPreconditioningActivated", "mileage", "mileageUnits",
+                     "startTime", "timeZone", "totalChargingDurationSec",
+                     "chargingLocation", "publicChargingPoint")
+
+# Attributes of a single tyre, fetched with one C-level multi-key lookup
+_TYRE_FIELDS = itemgetter("dimension", "mountingDate", "partNumber", "runFlat",
+                          "season", "tread", "tyreProductionDate", "tyreWear")
+
+
+def _load_json(file):
+    """Parse a complete JSON file, module-level so it can run in a worker process"""
+    with open(file, 'rb') as f:
+        buf = f.read()
+    return orjson.loads(buf) if orjson else json.loads(buf)
+
+
+def _fmt_dt(dt):
+    """Format datetime as FMT, specialized f-string is much faster than strftime"""
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
+
+
+@lru_cache(maxsize=32)
+def _tz(name):
+    """Cached ZoneInfo lookup, avoids re-reading tzdata for every record"""
+    return ZoneInfo(name)
+
+
+_UTC = timezone.utc
+
+@lru_cache(maxsize=4096)
+def _tz_offset(name, day):
+    """Cached UTC offset in seconds for timezone name on the given day (epoch seconds),
+       None if the offset changes during that day (DST transition)"""
+    tz   = _tz(name)
+    off1 = datetime.fromtimestamp(day, tz).utcoffset()
+    off2 = datetime.fromtimestamp(day + 86399, tz).utcoffset()
+    return off1.total_seconds() if off1 == off2 else None
+
+
+if numba:
+    @numba.njit(parallel=True, fastmath=True)
+    def _compute_energy(capacity, soc1, soc2, consumed, increase, duration):
+        """JIT-compiled parallel kernel for delta/loss/power over all records"""
+        n     = soc1.shape[0]
+        delta = np.empty(n)
+        loss  = np.empty(n)
+        kw    = np.empty(n)
+        for i in numba.prange(n):
+            delta[i] = capacity * (soc2[i] - soc1[i]) / 100
+            loss[i]  = (consumed[i] - increase[i]) / consumed[i] * 100 if consumed[i] > 0 else 0
+            kw[i]    = consumed[i] / duration[i] * 3600 if duration[i] > 0 else 0
+        return delta, loss, kw
+
+
+
 class iX1:
     capacity_net   = 64.8   # Net capacity battery / kWh
     capacity_gross = 66.5   # Gross capacity battery / kWh
@@ -73,44 +165,66 @@ class JSONData:
 
 
     def read_json(self, file):
-        with open(file, 'r', encoding="utf-8") as f:
-            data = json.load(f)
-        self.data = data
+        # Read raw bytes, orjson (if available) parses these much faster than stdlib json
+        self.data = _load_json(file)
 
 
-    def print_list(self, obj, indent, level):
-        for val in obj:
-            if type(val) is str:
-                print(f"{indent} \"{val}\"")
-            elif type(val) in (int, float, bool):
-                print(f"{indent} {val}")
-            else:
-                self.print_obj(val, indent, level)
+    def stream_items(self, file):
+        """Yield top-level list items incrementally without loading the whole file (requires ijson)"""
+        with open(file, 'rb') as f:
+            # use_float=True yields native floats like json/orjson, not decimal.Decimal
+            yield from ijson.items(f, "item", use_float=True)
 
 
-    def print_keys(self, obj, indent, level):
-        for k, val in obj.items():
-            if type(val) is str:
-                print(f"{indent} {k} = \"{val}\"")
-            elif type(val) in (int, float, bool):
-                print(f"{indent} {k} = {val}")
-            else:
-                print(f"{indent} {k} = ...")
-                self.print_obj(val, indent+"  ", level+1)
-        
+    def process_file(self, file):
+        """Read and process a single JSON file"""
+        self.read_json(file)
+        self.process_data()
+
+
+    def _print_str(self, key, val, indent, level):
+        if key is None:
+            print(f"{indent} \"{val}\"")
+        else:
+            print(f"{indent} {key} = \"{val}\"")
 
-    def print_obj(self, obj, indent, level):
-        if Options.limit and level > Options.limit:
-            return
 
-        if type(obj) is dict:
-            print(f"{indent} {{...}}")
-            self.print_keys(obj, indent+"  ", level+1)
-        elif type(obj) is list:
-            print(f"{indent} [...]")
-            self.print_list(obj, indent+" .", level+1)
+    def _print_num(self, key, val, indent, level):
+        if key is None:
+            print(f"{indent} {val}")
         else:
-            print(f"{indent} UNKNOWN", type(obj))
+            print(f"{indent} {key} = {val}")
+
+
+    # Type-indexed dispatch table, one dict lookup instead of a chain of type checks per node
+    _PRINTERS = { str: _print_str, int: _print_num, float: _print_num, bool: _print_num }
+
+
+    def print_obj(self, obj, indent, level):
+        # Walk the tree with an explicit stack instead of recursion, children are
+        # pushed in reverse so the output order is unchanged
+        printers = self._PRINTERS
+        stack = [(None, obj, indent, level)]
+        while stack:
+            key, val, indent, level = stack.pop()
+            handler = printers.get(type(val))
+            if handler:
+                handler(self, key, val, indent, level)
+                continue
+            if key is not None:
+                print(f"{indent} {key} = ...")
+                indent += "  "
+                level  += 1
+            if Options.limit and level > Options.limit:
+                continue
+            if isinstance(val, dict):
+                print(f"{indent} {{...}}")
+                stack.extend((k, v, indent+"  ", level+1) for k, v in reversed(val.items()))
+            elif isinstance(val, list):
+                print(f"{indent} [...]")
+                stack.extend((None, v, indent+" .", level+1) for v in reversed(val))
+            else:
+                print(f"{indent} UNKNOWN", type(val))
 
 
     def process_data(self):
@@ -121,36 +235,44 @@ class JSONData:
 class Ladehistorie(JSONData):
     """Data handling for BMW CARDATA Ladehistorie"""
 
+    # CSV column names, shared by the row and vectorized pipelines
+    CSV_FIELDS = ["Start date", "End date", "Duration/s", "Location", "Public", "Mileage/km",
+                  "SoC1/%", "SoC2/%", "Delta/kWh", "Grid/kWh", "Battery/kWh", "Loss/%", "Power/kW"]
+
     def __init__(self):
         super().__init__()
+        self._dec = "."             # locale decimal point for CSV output
+        self._csv_started = False   # vectorized pipeline already wrote the header
 
 
-    def process_item(self, index, obj):
+    def process_item(self, index, obj, tz=None):
         # Obj is a dict {}
-        if type(obj) != dict:
+        if not isinstance(obj, dict):
             error("Ladehistorie: item is of type", type(obj))
 
         # Get attributes
-        displayedSoc                    = obj["displayedSoc"]
-        displayedStartSoc               = obj["displayedStartSoc"]
-        endTime                         = obj["endTime"]
-        energyConsumedFromPowerGridKwh  = obj["energyConsumedFromPowerGridKwh"]
-        energyIncreaseHvbKwh            = obj["energyIncreaseHvbKwh"]
-        isPreconditioningActivated      = obj["isPreconditioningActivated"]
-        mileage                         = obj["mileage"]
-        mileageUnits                    = obj["mileageUnits"]
-        startTime                       = obj["startTime"]
-        timeZone                        = obj["timeZone"]
-        totalChargingDurationSec        = obj["totalChargingDurationSec"]
-
-        location                        = obj["chargingLocation"]["formattedAddress"]
-        public                          = "(Public)" if obj["publicChargingPoint"] else ""
+        (displayedSoc, displayedStartSoc, endTime,
+         energyConsumedFromPowerGridKwh, energyIncreaseHvbKwh,
+         isPreconditioningActivated, mileage, mileageUnits,
+         startTime, timeZone, totalChargingDurationSec,
+         chargingLocation, publicChargingPoint)  = _FIELDS(obj)
+
+        location                        = chargingLocation["formattedAddress"]
+        public                          = "(Public)" if publicChargingPoint else ""
 
         bat1     = displayedStartSoc
         bat2     = displayedSoc
-        tz       = ZoneInfo(timeZone)
-        start    = datetime.fromtimestamp(startTime).astimezone(tz).strftime("%Y-%m-%d %H:%M:%S")
-        end      = datetime.fromtimestamp(endTime).astimezone(tz).strftime("%Y-%m-%d %H:%M:%S")
+        if tz is None:
+            tz   = _tz(timeZone)
+        _fromtimestamp = datetime.fromtimestamp     # avoid repeated attribute lookup
+        # UTC offset is cached per (timezone, day), the timezone's transition search
+        # only runs for dates not seen before, or exactly on DST transition days
+        off1     = _tz_offset(timeZone, startTime - startTime % 86400)
+        off2     = _tz_offset(timeZone, endTime - endTime % 86400)
+        start    = _fmt_dt(_fromtimestamp(startTime + off1, _UTC) if off1 is not None
+                           else _fromtimestamp(startTime, tz))
+        end      = _fmt_dt(_fromtimestamp(endTime + off2, _UTC) if off2 is not None
+                           else _fromtimestamp(endTime, tz))
         duration = int(totalChargingDurationSec / 60 + 0.5) # min
         km       = str(mileage) + " " + mileageUnits.lower()
         pre      = "" ##NOTUSED: always True???## "(pre-conditoned)" if isPreconditioningActivated else ""
@@ -161,8 +283,13 @@ class Ladehistorie(JSONData):
         kW       = energyConsumedFromPowerGridKwh / totalChargingDurationSec * 3600 if totalChargingDurationSec > 0 else 0
 
         if Options.csv:
-            csv_output.add_row([start, end, totalChargingDurationSec, location, public, mileage, bat1, bat2,
-                               delta, consumed, increase, loss, kW])
+            # Pre-formatted string cells, the csv writer just joins them without
+            # any per-cell repr; decimal point follows the locale set in process_items
+            floats = (f"{delta:.3f}", f"{consumed:.3f}", f"{increase:.3f}", f"{loss:.3f}", f"{kW:.3f}")
+            if self._dec != ".":
+                floats = tuple( s.replace(".", self._dec) for s in floats )
+            csv_output.add_row((start, end, str(totalChargingDurationSec), location, public,
+                               str(mileage), str(bat1), str(bat2)) + floats)
         else:
             print(f"[{index:02d}] Charging session: {start} / {duration} min")
             print(f"     Location: {location} {public}")
@@ -172,24 +299,130 @@ class Ladehistorie(JSONData):
             print()
 
     
+    def _write_vectorized(self, out):
+        """Write the columnar CSV table, further input files append to the output"""
+        first = not self._csv_started
+        self._csv_started = True
+        verbose(f"writing CSV output to {Options.output}")
+        # Same output convention as csvoutput: ; separator and quoting for "German" Excel
+        locale.setlocale(locale.LC_ALL, "")
+        if locale.localeconv()["decimal_point"] == ",":
+            out.to_csv(Options.output, index=False, sep=";", decimal=",",
+                       float_format="%.3f", quoting=csv.QUOTE_ALL, lineterminator="\r\n",
+                       mode="w" if first else "a", header=first)
+        else:
+            # Pre-format the float columns in bulk, then let the C csv writer join the
+            # rows, producing exactly the same bytes as the row-at-a-time path
+            # (pyarrow.csv was tried here, but none of its quoting styles can
+            # reproduce the csv module's minimal quoting)
+            for col in ("Delta/kWh", "Grid/kWh", "Battery/kWh", "Loss/%", "Power/kW"):
+                out[col] = np.char.mod("%.3f", out[col].to_numpy(np.float64))
+            with open(Options.output, "w" if first else "a", newline='', encoding="utf-8") as f:
+                writer = csv.writer(f, dialect="excel")
+                if first:
+                    writer.writerow(self.CSV_FIELDS)
+                writer.writerows(out.itertuples(index=False, name=None))
+
+
+    def process_data_vectorized(self):
+        """Columnar CSV pipeline using pandas/numpy, much faster for large histories"""
+        if not self.data:
+            # A car without any charging sessions, still emit the CSV header
+            self._write_vectorized(pd.DataFrame(columns=self.CSV_FIELDS))
+            return
+
+        df = pd.DataFrame(self.data)
+
+        consumed = df["energyConsumedFromPowerGridKwh"]
+        increase = df["energyIncreaseHvbKwh"]
+        duration = df["totalChargingDurationSec"]
+
+        start = pd.to_datetime(df["startTime"], unit="s", utc=True)
+        end   = pd.to_datetime(df["endTime"],   unit="s", utc=True)
+
+        if numba:
+            delta, loss, kW = _compute_energy(iX1.capacity_net,
+                                              df["displayedStartSoc"].to_numpy(np.float64),
+                                              df["displayedSoc"].to_numpy(np.float64),
+                                              consumed.to_numpy(np.float64),
+                                              increase.to_numpy(np.float64),
+                                              duration.to_numpy(np.float64))
+        else:
+            delta = iX1.capacity_net * (df["displayedSoc"] - df["displayedStartSoc"]) / 100
+            loss  = np.where(consumed > 0, (consumed - increase) / consumed * 100, 0)
+            kW    = np.where(duration > 0, consumed / duration * 3600, 0)
+
+        out = pd.DataFrame(index=df.index)
+        # Convert timestamps per timezone, Ladehistorie files practically always use a single one
+        for zone in df["timeZone"].unique():
+            m = df["timeZone"] == zone
+            out.loc[m, "Start date"] = start[m].dt.tz_convert(zone).dt.strftime(FMT)
+            out.loc[m, "End date"]   = end[m].dt.tz_convert(zone).dt.strftime(FMT)
+        # str() of the original values like the row path, a fractional value anywhere
+        # in the column would otherwise promote it to float64 and turn 80 into 80.0
+        out["Duration/s"]  = [ str(obj["totalChargingDurationSec"]) for obj in self.data ]
+        out["Location"]    = df["chargingLocation"].map(lambda loc: loc["formattedAddress"])
+        out["Public"]      = np.where(df["publicChargingPoint"], "(Public)", "")
+        out["Mileage/km"]  = [ str(obj["mileage"]) for obj in self.data ]
+        out["SoC1/%"]      = [ str(obj["displayedStartSoc"]) for obj in self.data ]
+        out["SoC2/%"]      = [ str(obj["displayedSoc"]) for obj in self.data ]
+        out["Delta/kWh"]   = delta
+        out["Grid/kWh"]    = consumed
+        out["Battery/kWh"] = increase
+        out["Loss/%"]      = loss
+        out["Power/kW"]    = kW
+
+        self._write_vectorized(out)
+
+
+    def process_items(self, items, tz=None):
+        """Process an iterable of charge history items, from memory or streamed"""
+        if Options.csv and not csv_output.is_open():
+            # Open the CSV output once for the whole run (closed in main), so rows
+            # from further input files append instead of truncating the file,
+            # streamed directly to disk instead of buffering them all in memory
+            csv_output.add_fields(self.CSV_FIELDS)
+            verbose(f"writing CSV output to {Options.output}")
+            csv_output.open(Options.output)
+            self._dec = locale.localeconv()["decimal_point"]
+
+        # Process charge history items
+        for i, obj in enumerate(items):
+            if ic.enabled:
+                ic(i, obj)
+            self.process_item(i, obj, tz)
+
+
     def process_data(self):
         # Ladehistorie top-level is a list []
-        if type(self.data) != list:
+        if not isinstance(self.data, list):
             error("Ladehistorie: top-level is of type", type(self.data))
-        
-        if Options.csv:
-            csv_output.add_fields(["Start date", "End date", "Duration/s", "Location", "Public", "Mileage/km", 
-                                      "SoC1/%", "SoC2/%", "Delta/kWh", "Grid/kWh", "Battery/kWh", "Loss/%", "Power/kW"])
 
-        # Process charge history items
-        for i, obj in enumerate(self.data):
-            ic(i, obj)
-            self.process_item(i, obj)
+        if Options.csv and pd:
+            # Vectorized pipeline, the row-at-a-time loop below remains for text output
+            self.process_data_vectorized()
+            return
 
-        # Output to CSV file
-        if Options.csv:
-            verbose(f"writing CSV output to {Options.output}")
-            csv_output.write(Options.output)
+        # Ladehistorie files practically always use a single timezone, resolve it once up front
+        zones = { obj.get("timeZone") for obj in self.data if isinstance(obj, dict) }
+        tz = _tz(zones.pop()) if len(zones) == 1 and None not in zones else None
+        self.process_items(self.data, tz)
+
+
+    def process_file(self, file):
+        # Stream items with ijson if available, the vectorized pipeline needs the full data anyway
+        if ijson and not (Options.csv and pd):
+            # ijson.items() would silently yield nothing for a non-list top level,
+            # peek at the first JSON token to keep the Ladehistorie type check
+            with open(file, 'rb') as f:
+                lead = f.read(64).lstrip()
+            if not lead.startswith(b"["):
+                error("Ladehistorie: top-level is of type",
+                      dict if lead.startswith(b"{") else "unknown")
+            verbose("streaming JSON file with ijson")
+            self.process_items(self.stream_items(file))
+        else:
+            super().process_file(file)
 
 
 
@@ -202,20 +435,14 @@ class Reifendiagnose(JSONData):
 
     def process_item(self, obj):
         # Obj is a dict {}
-        if type(obj) != dict:
+        if not isinstance(obj, dict):
             error("Reifendiagnose: item is of type", type(obj))
 
         # Get tyres
         for tyre in [ "frontLeft", "frontRight", "rearLeft", "rearRight" ]:
-            obj1     = obj[tyre]
-            dim      = obj1["dimension"]["value"]
-            date     = obj1["mountingDate"]["value"]
-            part     = obj1["partNumber"]["value"]
-            runflat  = obj1["runFlat"]["value"]
-            season   = obj1["season"]["value"]
-            tread    = obj1["tread"]["value"]
-            proddate = obj1["tyreProductionDate"]["value"]
-            wear     = obj1["tyreWear"].get("value") or "n/a"
+            (dim, date, part, runflat, season, tread, proddate, wear) = \
+                ( d.get("value") for d in _TYRE_FIELDS(obj[tyre]) )
+            wear = wear or "n/a"
 
             print(f"  {tyre.capitalize():<10s}  {tread}, {dim} ({season}), {part}, {date}, {wear}")
 
@@ -223,7 +450,7 @@ class Reifendiagnose(JSONData):
     
     def process_data(self):
         # Reifendiagnose top-level is a dict []
-        if type(self.data) != dict:
+        if not isinstance(self.data, dict):
             error("Reifendiagnose: top-level is of type", type(self.data))
         
         # Dig deeper ... ;-)
@@ -275,10 +502,23 @@ def main():
     if args.reifendiagnose:
         data = Reifendiagnose()
 
-    for f in args.filename:
-        verbose("processing JSON file", f)
-        data.read_json(f)
-        data.process_data()
+    if len(args.filename) > 1:
+        # Parse files in parallel worker processes, parsing is the dominant cost;
+        # processing stays in the main process to keep output order and CSV state intact
+        verbose(f"parsing {len(args.filename)} JSON files in parallel")
+        with concurrent.futures.ProcessPoolExecutor() as ex:
+            for f, parsed in zip(args.filename, ex.map(_load_json, args.filename)):
+                verbose("processing JSON file", f)
+                data.data = parsed
+                data.process_data()
+    else:
+        for f in args.filename:
+            verbose("processing JSON file", f)
+            data.process_file(f)
+
+    # Close CSV output, if streaming mode was used
+    if Options.csv:
+        csv_output.close()
 
 
 
@@ -21,6 +21,9 @@
 #   csv_output.add_row([a, b, c, ...])
 #   csv_output.add_fields([name1, name2, ...])
 #   csv_output.write(file="", set_locale=True)       file="" uses stdout
+#   csv_output.open(file="", set_locale=True)        streaming mode, rows written immediately
+#   csv_output.is_open()
+#   csv_output.close()
 #   csv_output(a, b, c, ...)
 #   csv_output(row=[a, b, c, ...])
 #   csv_output(fields=[a, b, c, ...])
@@ -33,27 +36,40 @@
 #       locale aware global CSV output class
 # Version 2.0 / 2024-11-21
 #       Reworked as a proper csv_output object, added new interface
+# Version 2.1 / 2026-08-28
+#       Added streaming mode open()/close(), rows are written immediately
+#       instead of buffered in memory
+#       add_row() accepts tuples, buffer is a deque
+#       Column-major float conversion in write()
+#       Float conversion uses cached decimal point instead of locale.format_string()
 
 
 import csv
 import locale
 import sys
 import typing
+from collections import deque
+from itertools import zip_longest
 
-VERSION = "2.0 / 2024-11-21"
+VERSION = "2.1 / 2026-08-28"
 AUTHOR  = "Martin Junius"
 NAME    = "csvoutput"
 
 
 DEFAULT_FLOAT_FORMAT = "%.3f"
 
+_PAD = object()     # filler for ragged rows in the column-major pass
+
 class CSVOutput:
     """CSV output class"""
 
     def __init__(self):
-        self._cache      = []
+        self._cache      = deque()
         self._fields     = None
         self._float_fmt  = None    # format for floats if set
+        self._dec        = "."     # locale decimal point, cached by _make_writer()
+        self._file       = None    # open file in streaming mode
+        self._writer     = None    # csv writer in streaming mode
 
 
     def __call__(self, *args, **kwargs):
@@ -78,31 +94,55 @@ class CSVOutput:
 
 
     def _fmt(self, v: float):
-        return locale.format_string(self._float_fmt, v)
+        # Plain % formatting with the cached decimal point, locale.format_string
+        # would re-examine the locale settings for every single value
+        s = self._float_fmt % v
+        return s.replace(".", self._dec) if self._dec != "." else s
 
 
-    def add_row(self, data: list):
-        self._cache.append(data)
+    def add_row(self, data: typing.Sequence):
+        if self._writer:
+            # Streaming mode, write row immediately
+            self._writer.writerow(self._fmt_row(data))
+        else:
+            self._cache.append(data)
 
 
     def add_fields(self, fields: list):
         self._fields = fields
+        if self._writer:
+            self._writer.writerow(fields)
 
 
-    def _write(self, f: typing.TextIO):            
-        if locale.localeconv()['decimal_point'] == ",":
+    def _make_writer(self, f: typing.TextIO):
+        self._dec = locale.localeconv()['decimal_point']
+        if self._dec == ",":
             # Use ; as the separator and quote all fields for easy import in "German" Excel
-            writer = csv.writer(f, dialect="excel", delimiter=";", quoting=csv.QUOTE_ALL)
-        else:
-            writer = csv.writer(f, dialect="excel")
+            return csv.writer(f, dialect="excel", delimiter=";", quoting=csv.QUOTE_ALL)
+        return csv.writer(f, dialect="excel")
+
+
+    def _fmt_row(self, row: typing.Sequence):
+        if self._float_fmt:
+            row = [ self._fmt(v) if isinstance(v, float) else v   for v in row ]
+        return row
+
+
+    def _write(self, f: typing.TextIO):
+        writer = self._make_writer(f)
         if self._fields:
             writer.writerow(self._fields)
-        
-        # Write rows one by one the enable conversion of float values
-        for row in self._cache:
-            if self._float_fmt:
-                row = [ self._fmt(v) if type(v) == float else v   for v in row ]
-            writer.writerow(row)
+
+        if self._float_fmt and self._cache:
+            # Column-major pass: convert float values one (homogeneous) column at a time,
+            # then write all rows in bulk; ragged rows are padded with a sentinel
+            # that is stripped again on output
+            fmt = self._fmt
+            columns = [ [ fmt(v) if isinstance(v, float) else v   for v in col ]
+                        for col in zip_longest(*self._cache, fillvalue=_PAD) ]
+            writer.writerows( [ v for v in row if v is not _PAD ]   for row in zip(*columns) )
+        else:
+            writer.writerows(self._cache)
 
 
     def write(self, file: str=None, set_locale: bool=True):
@@ -116,6 +156,29 @@ class CSVOutput:
                 self._write(sys.stdout)
 
 
+    def open(self, file: str=None, set_locale: bool=True):
+        """Switch to streaming mode, all rows are written to file immediately, not buffered"""
+        if set_locale:
+            self.set_default_locale()
+        self._file = open(file, 'w', newline='', encoding="utf-8") if file else None
+        self._writer = self._make_writer(self._file if self._file else sys.stdout)
+        if self._fields:
+            self._writer.writerow(self._fields)
+
+
+    def is_open(self):
+        """True if streaming mode is active"""
+        return self._writer is not None
+
+
+    def close(self):
+        """End streaming mode and close the output file"""
+        self._writer = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
 
 # Global object
 csv_output = CSVOutput()